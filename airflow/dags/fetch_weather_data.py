@@ -22,7 +22,8 @@ dag = DAG(
     catchup=False,
     tags=['weather', 'api', 'hourly'],
     default_args={
-        'retries': 3,
+        # Transient HTTP errors are retried inside fetch_weather_data
+        'retries': 1,
         'retry_delay': timedelta(minutes=5),
     },
 )
@@ -1,5 +1,5 @@
--- Staging model for weather data from CSV file(s)
--- Combines all weather CSV files and deduplicates
+-- Staging model for weather data from Parquet file(s)
+-- Combines all weather files and deduplicates
 
 {{ config(materialized='view') }}
 
@@ -61,13 +61,13 @@ CONSTRAINT_URL="https://raw.githubusercontent.com/apache/airflow/constraints-${A
 echo "Detected Airflow version: ${AIRFLOW_VERSION}"
 echo "Using constraints from: $CONSTRAINT_URL"
 
-# Install Airflow and requests with constraints first
+# Install Airflow and aiohttp with constraints first
 if curl -s -f "$CONSTRAINT_URL" > /dev/null 2>&1; then
-    pip install apache-airflow requests --constraint "$CONSTRAINT_URL"
+    pip install apache-airflow aiohttp --constraint "$CONSTRAINT_URL"
     echo -e "${GREEN}✓ Airflow installed${NC}"
 else
     echo -e "${YELLOW}⚠ Constraints file not found, installing Airflow without constraints...${NC}"
-    pip install apache-airflow requests
+    pip install apache-airflow aiohttp
 fi
 
 # Install dbt and psycopg2-binary separately (without constraints to avoid build issues)
@@ -75,6 +75,11 @@ echo "Installing dbt and PostgreSQL packages..."
 pip install dbt-postgres psycopg2-binary
 echo -e "${GREEN}✓ dbt packages installed${NC}"
 
+# Install data packages used by the fetch and load scripts
+echo "Installing data packages..."
+pip install pyarrow numpy orjson
+echo -e "${GREEN}✓ Data packages installed${NC}"
+
 echo -e "${GREEN}✓ Python dependencies installed${NC}"
 echo ""
 
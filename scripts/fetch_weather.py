@@ -1,16 +1,74 @@
 """
-Simple script to fetch hourly weather data from Open-Meteo API using requests library.
+Simple script to fetch hourly weather data from Open-Meteo API using aiohttp.
 Fetches weather for all outlets from outlet.csv for the last 24 hours.
 New outlets are automatically included when added to the CSV.
 """
 
-from typing import Any
-
-
-import requests
+import aiohttp
+import argparse
+import asyncio
 import csv
-from datetime import datetime, timedelta
+import functools
+import gzip
+import io
+import logging
+from collections import namedtuple
+import numpy as np
+import orjson
+import os
+import tempfile
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from datetime import datetime, time, timedelta
 from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from load_csv_data import COPY_SQL, connect, get_table_schema
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of concurrent requests to Open-Meteo
+MAX_CONCURRENT_REQUESTS = 10
+
+# Retry policy for transient HTTP errors
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Outlets per request; keeps the comma-joined coordinates under URL length limits
+OUTLETS_PER_REQUEST = 100
+
+# Timezone the API reports hours in; cache day files are split on its dates
+WEATHER_TIMEZONE = "America/New_York"
+
+# Cached days that are not yet over are refetched after this long. Kept well
+# clear of the hourly schedule so a hit doesn't depend on scheduler jitter:
+# the next run reuses the file, the one after refreshes it.
+WEATHER_CACHE_MAX_AGE = timedelta(minutes=90)
+
+# Cache files older than this are outside any fetch window and get deleted
+WEATHER_CACHE_RETENTION = timedelta(days=3)
+
+# Bump when the shape of the parsed outlets changes to invalidate old caches
+OUTLETS_CACHE_VERSION = 3
+
+# Outlet with valid coordinates; a tuple is much smaller than a dict per outlet
+Outlet = namedtuple('Outlet', ['id', 'name', 'latitude', 'longitude'])
+
+# Schema of the weather records; metrics are reported to one decimal place
+# (humidity as whole percent), so 32-bit floats and int16 lose no precision
+WEATHER_SCHEMA = pa.schema([
+    ("outlet_id", pa.int32()),
+    ("outlet_name", pa.string()),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("time", pa.timestamp("s")),
+    ("wind_speed_10m", pa.float32()),
+    ("temperature_2m", pa.float32()),
+    ("relative_humidity_2m", pa.int16()),
+])
 
 
 def load_outlets(csv_path):
@@ -18,192 +76,610 @@ def load_outlets(csv_path):
     Load outlets from CSV file, filter valid coordinates, and deduplicate.
     
     Returns:
-        List of dictionaries with outlet information
+        List of Outlet tuples
     """
     outlets = {}
     
     with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        # Resolve column positions once instead of building a dict per row
+        header = next(reader, None)
+        if header is None:
+            return []
+        id_idx = header.index('id')
+        name_idx = header.index('name')
+        lat_idx = header.index('latitude')
+        lon_idx = header.index('longitude')
+        
         for row in reader:
-            outlet_id = int(row['id'])
-            lat = float(row['latitude']) if row['latitude'] else 0.0
-            lon = float(row['longitude']) if row['longitude'] else 0.0
+            lat_s, lon_s = row[lat_idx], row[lon_idx]
             
-            # Skip invalid coordinates
+            # Skip missing or invalid coordinates
+            if not lat_s or not lon_s:
+                continue
+            lat = float(lat_s)
+            lon = float(lon_s)
             if lat == 0.0 and lon == 0.0:
                 continue
             
             # Keep only first occurrence of each outlet (deduplicate)
+            outlet_id = int(row[id_idx])
             if outlet_id not in outlets:
-                outlets[outlet_id] = {
-                    'id': outlet_id,
-                    'name': row['name'],
-                    'latitude': lat,
-                    'longitude': lon
-                }
+                outlets[outlet_id] = Outlet(outlet_id, row[name_idx], lat, lon)
+    
+    return list(outlets.values())
+
+
+@functools.lru_cache(maxsize=4)
+def _load_outlets_for_key(csv_path, mtime_ns, size, cache_path):
+    """
+    Return parsed outlets for a given version of the CSV file.
+    
+    The parsed outlets are also stored as JSON rows in cache_path so they
+    survive across Airflow worker processes; the cache is reused only if
+    the key still matches.
+    """
+    key = [OUTLETS_CACHE_VERSION, csv_path, mtime_ns, size]
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = orjson.loads(f.read())
+        if cached['key'] == key:
+            return [Outlet(*row) for row in cached['outlets']]
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing or unreadable cache, parse the CSV again
+        pass
+    
+    outlets = load_outlets(csv_path)
+    
+    # Write to a unique temporary file first so concurrent writers don't clobber
+    # each other and readers never see a partial cache
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=cache_dir, delete=False) as f:
+            f.write(orjson.dumps({'key': key, 'outlets': [list(outlet) for outlet in outlets]}))
+        try:
+            os.replace(f.name, cache_path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+    except OSError as e:
+        logger.warning("Could not write outlets cache: %s", e)
     
-    return list[Any](outlets.values())
+    return outlets
 
 
-def fetch_weather_data(latitude, longitude, start_date, end_date):
+def load_outlets_cached(csv_path, cache_path):
     """
-    Fetch hourly weather data from Open-Meteo API.
+    Load outlets from CSV file, skipping the parse if the file is unchanged.
     
     Args:
-        latitude: Latitude of the location
-        longitude: Longitude of the location
-        start_date: Start date (datetime object)
+        csv_path: Path to the outlets CSV file
+        cache_path: Path to the on-disk cache of parsed outlets
+    
+    Returns:
+        List of Outlet tuples
+    """
+    stat = os.stat(csv_path)
+    return _load_outlets_for_key(str(csv_path), stat.st_mtime_ns, stat.st_size, str(cache_path))
+
+
+async def fetch_weather_data(session, semaphore, outlets, start_date, end_date):
+    """
+    Fetch hourly weather data from Open-Meteo API for several outlets in one request.
+    
+    Args:
+        session: Shared aiohttp ClientSession
+        semaphore: Semaphore bounding the number of in-flight requests
+        outlets: List of Outlet tuples
+        start_date: Start date (date or datetime object)
         end_date: End date (datetime object)
     
     Returns:
-        Dictionary with hourly weather data or None if error
+        List with one hourly weather dictionary per outlet (same order) or None if error
     """
     url = "https://api.open-meteo.com/v1/forecast"
     
     # API only accepts dates, not datetime. We'll filter results later.
+    # Multiple locations are requested by comma-joining the coordinates.
     params = {
-        "latitude": latitude,
-        "longitude": longitude,
+        "latitude": ",".join(f"{outlet.latitude:.4f}" for outlet in outlets),
+        "longitude": ",".join(f"{outlet.longitude:.4f}" for outlet in outlets),
         "start_date": start_date.strftime("%Y-%m-%d"),
         "end_date": end_date.strftime("%Y-%m-%d"),
         "hourly": "wind_speed_10m,temperature_2m,relative_humidity_2m",
-        "timezone": "America/New_York"
+        "timezone": WEATHER_TIMEZONE
     }
     
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching weather data: {e}")
-        return None
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info,
+                            response.history,
+                            status=response.status,
+                            message=response.reason,
+                        )
+                    response.raise_for_status()  # Raise an exception for bad status codes
+                    weather_json = orjson.loads(await response.read())
+                    # A single location is returned as an object rather than a list
+                    if isinstance(weather_json, dict):
+                        weather_json = [weather_json]
+                    return weather_json
+        except aiohttp.ClientResponseError as e:
+            # Only retry on statuses that are likely to be transient
+            if e.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                logger.warning("Error fetching weather data: %s", e)
+                return None
+        except orjson.JSONDecodeError as e:
+            logger.warning("Error decoding weather data: %s", e)
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == MAX_RETRIES:
+                logger.warning("Error fetching weather data: %s", e)
+                return None
+        
+        # Exponential backoff outside the semaphore so other requests can proceed
+        await asyncio.sleep(BACKOFF_FACTOR * (2 ** attempt))
 
 
 def parse_weather_data(weather_json, outlet, start_date, end_date):
     """
-    Parse weather JSON response into list of records with outlet information.
+    Parse weather JSON response into a record batch with outlet information.
     Filters to only include data within the specified time range (last 24 hours).
     
     Args:
         weather_json: JSON response from Open-Meteo API
-        outlet: Dictionary with outlet information (id, name, latitude, longitude)
+        outlet: Outlet tuple (id, name, latitude, longitude)
         start_date: Start datetime for filtering
         end_date: End datetime for filtering
     
     Returns:
-        List of dictionaries with weather data including outlet info
+        pyarrow RecordBatch with WEATHER_SCHEMA, or None if there is no data
     """
     if not weather_json or "hourly" not in weather_json:
-        return []
+        return None
     
     hourly = weather_json["hourly"]
     times = hourly.get("time", [])
-    wind_speeds = hourly.get("wind_speed_10m", [])
-    temperatures = hourly.get("temperature_2m", [])
-    humidities = hourly.get("relative_humidity_2m", [])
-    
-    records = []
-    for i in range(len(times)):
-        # Parse the time string to datetime for comparison
-        time_str = times[i]
+    
+    try:
+        # Open-Meteo returns times in ISO format without timezone: "2025-11-30T10:00"
+        time_arr = np.array(times, dtype='datetime64[m]')
+    except ValueError:
+        return None
+    
+    # Only include records within the last 24 hours (between start_date and end_date)
+    mask = (time_arr >= np.datetime64(start_date)) & (time_arr <= np.datetime64(end_date))
+    idx = np.flatnonzero(mask)
+    n = len(idx)
+    
+    # Every hourly variable must line up with the time array; merged cache
+    # files or a malformed response can break that, so skip the outlet
+    metric_names = ["wind_speed_10m", "temperature_2m", "relative_humidity_2m"]
+    for name in metric_names:
+        if name in hourly and len(hourly[name]) != len(times):
+            logger.debug(
+                "Weather for %s (ID: %s): %s has %d values for %d times, skipping",
+                outlet.name, outlet.id, name, len(hourly[name]), len(times),
+            )
+            return None
+    
+    def metric(name):
+        field = WEATHER_SCHEMA.field(name)
+        values = pa.array(hourly.get(name, [None] * len(times)), type=pa.float32()).take(idx)
+        if pa.types.is_integer(field.type):
+            values = pc.round(values).cast(field.type)
+        return values
+    
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(np.full(n, outlet.id, dtype=np.int32)),
+            pa.array([outlet.name] * n, type=pa.string()),
+            pa.array(np.full(n, outlet.latitude, dtype=np.float64)),
+            pa.array(np.full(n, outlet.longitude, dtype=np.float64)),
+            pa.array(time_arr[idx].astype('datetime64[s]')),
+            *[metric(name) for name in metric_names],
+        ],
+        schema=WEATHER_SCHEMA,
+    )
+
+
+def weather_cache_path(cache_dir, outlet, day):
+    """Return the cache file for one outlet's hourly weather on one day."""
+    return cache_dir / f"{outlet.latitude:.4f}_{outlet.longitude:.4f}_{day.isoformat()}.json.gz"
+
+
+def load_cached_weather(cache_dir, outlet, days, now):
+    """
+    Read an outlet's cached day files, stopping at the first unusable day.
+    
+    A day file is usable if it was written after the day ended in
+    WEATHER_TIMEZONE, or is less than WEATHER_CACHE_MAX_AGE old.
+    
+    Args:
+        cache_dir: Directory of cached per-day responses
+        outlet: Outlet tuple
+        days: Consecutive dates to read
+        now: Current time (timezone-aware)
+    
+    Returns:
+        Tuple of (hourly dictionary for the usable leading days, first day that
+        must be fetched or None if every day is cached)
+    """
+    tz = ZoneInfo(WEATHER_TIMEZONE)
+    hourly = {}
+    for day in days:
+        path = weather_cache_path(cache_dir, outlet, day)
         try:
-            # Open-Meteo returns times in ISO format: "2025-11-30T10:00"
-            # Parse without timezone info for comparison
-            time_dt = datetime.fromisoformat(time_str.replace('Z', ''))
-            
-            # Only include records within the last 24 hours (between start_date and end_date)
-            if start_date <= time_dt <= end_date:
-                records.append({
-                    "outlet_id": outlet['id'],
-                    "outlet_name": outlet['name'],
-                    "latitude": outlet['latitude'],
-                    "longitude": outlet['longitude'],
-                    "time": times[i],
-                    "wind_speed_10m": wind_speeds[i] if i < len(wind_speeds) else None,
-                    "temperature_2m": temperatures[i] if i < len(temperatures) else None,
-                    "relative_humidity_2m": humidities[i] if i < len(humidities) else None,
-                })
-        except (ValueError, AttributeError) as e:
-            # If parsing fails, skip this record
+            written_at = datetime.fromtimestamp(path.stat().st_mtime, tz)
+        except OSError:
+            return hourly, day
+        
+        day_end = datetime.combine(day + timedelta(days=1), time(), tzinfo=tz)
+        if written_at < day_end and now - written_at > WEATHER_CACHE_MAX_AGE:
+            return hourly, day
+        
+        try:
+            with gzip.open(path, 'rb') as f:
+                day_hourly = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return hourly, day
+        
+        for key, values in day_hourly.items():
+            hourly.setdefault(key, []).extend(values)
+    
+    return hourly, None
+
+
+def merge_hourly(cached_hourly, weather_json):
+    """Prepend cached hourly arrays to a fetched response."""
+    if not cached_hourly or not weather_json or "hourly" not in weather_json:
+        return weather_json
+    
+    hourly = weather_json["hourly"]
+    return {
+        **weather_json,
+        "hourly": {key: cached_hourly.get(key, []) + values for key, values in hourly.items()},
+    }
+
+
+def save_cached_weather(cache_dir, outlet, weather_json):
+    """Split an outlet's hourly weather by day and write one cache file per day."""
+    hourly = weather_json.get("hourly") if weather_json else None
+    if not hourly or not hourly.get("time"):
+        return
+    
+    # Group hour indices by their date prefix ("2025-11-30T10:00" -> "2025-11-30")
+    day_indices = {}
+    for i, time_str in enumerate(hourly["time"]):
+        day_indices.setdefault(time_str[:10], []).append(i)
+    
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for day, indices in day_indices.items():
+        day_hourly = {key: [values[i] for i in indices] for key, values in hourly.items()}
+        path = weather_cache_path(cache_dir, outlet, datetime.fromisoformat(day).date())
+        
+        # Write to a unique temporary file first so readers never see a partial file
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=cache_dir, suffix='.tmp', delete=False) as f:
+                with gzip.GzipFile(fileobj=f, mode='wb') as gz:
+                    gz.write(orjson.dumps(day_hourly))
+            try:
+                os.replace(f.name, path)
+            except OSError:
+                os.unlink(f.name)
+                raise
+        except OSError as e:
+            logger.warning("Could not write weather cache %s: %s", path.name, e)
+
+
+def save_cached_responses(cache_dir, results):
+    """Write the cache files for a list of (outlet, weather_json) tuples."""
+    for outlet, weather_json in results:
+        save_cached_weather(cache_dir, outlet, weather_json)
+
+
+def prune_weather_cache(cache_dir, now):
+    """Delete cache files (and leftover temporary files) older than WEATHER_CACHE_RETENTION."""
+    if not cache_dir.exists():
+        return
+    
+    cutoff = (now - WEATHER_CACHE_RETENTION).timestamp()
+    removed = 0
+    for path in cache_dir.iterdir():
+        if not path.name.endswith(('.json.gz', '.tmp')):
             continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            # Removed concurrently by another run
+            continue
+    
+    if removed:
+        logger.debug("Pruned %d old weather cache files", removed)
+
+
+class WeatherWriter:
+    """
+    Incrementally write weather tables to a Snappy-compressed Parquet file.
+    
+    The file is only created once the first records are written, so a run
+    where every request fails does not leave an empty file behind.
+    """
+    
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.record_count = 0
+        self._writer = None
+    
+    def write(self, table):
+        """Append a table of weather records to the file as a single row group."""
+        if not table.num_rows:
+            return
+        
+        if self._writer is None:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.output_path, WEATHER_SCHEMA, compression="snappy")
+        
+        self._writer.write_table(table)
+        self.record_count += table.num_rows
     
-    return records
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
 
 
-def save_to_csv(records, output_path):
+async def fetch_all_outlets(outlets, start_date, end_date, cache_dir):
     """
-    Save weather records to CSV file.
+    Fetch weather data for all outlets, batching outlets into concurrent requests.
+    
+    Days already cached for an outlet are read from cache_dir; only the
+    outlet's first stale day onwards is requested from the API, and fetched
+    responses are written back to the cache.
     
     Args:
-        records: List of dictionaries with weather data
-        output_path: Path to output CSV file
+        outlets: List of Outlet tuples
+        start_date: Start datetime for the request
+        end_date: End datetime for the request
+        cache_dir: Directory of cached per-day responses
+    
+    Yields:
+        List of (outlet, weather_json) tuples for each request, as it completes
     """
-    if not records:
-        print("No records to save")
-        return
+    now = datetime.now(ZoneInfo(WEATHER_TIMEZONE))
+    await asyncio.to_thread(prune_weather_cache, cache_dir, now)
+    
+    days = [
+        start_date.date() + timedelta(days=i)
+        for i in range((end_date.date() - start_date.date()).days + 1)
+    ]
     
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Outlets fully served from cache, and the rest grouped by first stale day
+    cached = []
+    stale = {}
+    for outlet in outlets:
+        cached_hourly, first_stale_day = load_cached_weather(cache_dir, outlet, days, now)
+        if first_stale_day is None:
+            cached.append((outlet, {"hourly": cached_hourly}))
+        else:
+            stale.setdefault(first_stale_day, []).append((outlet, cached_hourly))
     
-    fieldnames = [
-        "outlet_id", "outlet_name", "latitude", "longitude", "time",
-        "wind_speed_10m", "temperature_2m", "relative_humidity_2m"
+    chunks = [
+        (fetch_start, group[i:i + OUTLETS_PER_REQUEST])
+        for fetch_start, group in stale.items()
+        for i in range(0, len(group), OUTLETS_PER_REQUEST)
     ]
+    logger.info(
+        "Using cached weather for %d outlets, fetching %d",
+        len(cached), sum(len(chunk) for _, chunk in chunks),
+    )
     
-    with open(output_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(records)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # One pooled connector so keep-alive connections to Open-Meteo are reused
+    connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
     
-    print(f"Saved {len(records)} records to {output_path}")
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def fetch_chunk(fetch_start, chunk):
+            chunk_outlets = [outlet for outlet, _ in chunk]
+            try:
+                return chunk, await fetch_weather_data(session, semaphore, chunk_outlets, fetch_start, end_date)
+            except Exception as e:
+                return chunk, e
+        
+        # Start the requests first so loading the cached outlets overlaps the network waits
+        tasks = [asyncio.create_task(fetch_chunk(fetch_start, chunk)) for fetch_start, chunk in chunks]
+        try:
+            for i in range(0, len(cached), OUTLETS_PER_REQUEST):
+                yield cached[i:i + OUTLETS_PER_REQUEST]
+            
+            for next_done in asyncio.as_completed(tasks):
+                chunk, response = await next_done
+                if isinstance(response, list):
+                    fetched = [(outlet, weather_json) for (outlet, _), weather_json in zip(chunk, response)]
+                    # Write the cache off the event loop so in-flight requests keep running
+                    await asyncio.to_thread(save_cached_responses, cache_dir, fetched)
+                    yield [
+                        (outlet, merge_hourly(cached_hourly, weather_json))
+                        for (outlet, cached_hourly), weather_json in zip(chunk, response)
+                    ]
+                else:
+                    # The whole request failed, so every outlet in it failed
+                    if isinstance(response, Exception):
+                        logger.warning("Request for %d outlets failed: %s", len(chunk), response)
+                    yield [(outlet, response) for outlet, _ in chunk]
+        finally:
+            for task in tasks:
+                task.cancel()
+
 
+def begin_weather_load(conn):
+    """Start the load transaction and make sure the weather tables exist."""
+    with conn.cursor() as cursor:
+        cursor.execute('SET LOCAL synchronous_commit = OFF;')
+        cursor.execute(get_table_schema('weather'))
+        cursor.execute(get_table_schema('weather_loaded_files'))
 
-def weather_fetch_pipeline():
+
+def load_weather_to_db(table, conn):
     """
-    Main function to fetch and save weather data for all outlets.
+    Append weather records to raw.weather using COPY, without touching disk.
+    
+    Args:
+        table: pyarrow Table with WEATHER_SCHEMA
+        conn: Open psycopg2 connection; the caller commits
+    """
+    if not table.num_rows:
+        return
+    
+    # PyArrow's C++ CSV writer serializes the columns straight into the COPY buffer
+    buffer = io.BytesIO()
+    pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    
+    column_names = ', '.join('datetime' if col == 'time' else col for col in table.column_names)
+    with conn.cursor() as cursor:
+        cursor.copy_expert(COPY_SQL.format(table_name='weather', column_names=column_names), buffer)
+
+
+async def fetch_and_save(outlets, start_date, end_date, cache_dir, conn, writer=None):
+    """
+    Fetch weather for all outlets, loading each response as soon as it arrives.
+    
+    Only the records of one request are held in memory at a time. Records are
+    copied into raw.weather and, if a writer is given, archived to Parquet.
+    The transaction is only opened once the first records arrive, and the
+    blocking database and file writes run in a worker thread so requests
+    still in flight are not stalled.
+    
+    Returns:
+        Number of records loaded
+    """
+    load_started = False
+    record_count = 0
+    fetched_count = 0
+    async for results in fetch_all_outlets(outlets, start_date, end_date, cache_dir):
+        batches = []
+        for outlet, weather_json in results:
+            if isinstance(weather_json, Exception) or not weather_json:
+                logger.debug("Weather for %s (ID: %s): failed (%s)", outlet.name, outlet.id, weather_json)
+                continue
+            
+            batch = parse_weather_data(weather_json, outlet, start_date, end_date)
+            if batch is not None:
+                batches.append(batch)
+            fetched_count += 1
+            logger.debug(
+                "Weather for %s (ID: %s): %d hourly records",
+                outlet.name, outlet.id, batch.num_rows if batch is not None else 0,
+            )
+        
+        table = pa.Table.from_batches(batches, schema=WEATHER_SCHEMA)
+        if not table.num_rows:
+            continue
+        
+        if not load_started:
+            await asyncio.to_thread(begin_weather_load, conn)
+            load_started = True
+        
+        await asyncio.to_thread(load_weather_to_db, table, conn)
+        if writer is not None:
+            await asyncio.to_thread(writer.write, table)
+        record_count += table.num_rows
+    
+    # One summary line instead of a stdout write per outlet
+    logger.info("Fetched %d/%d outlets, %d records", fetched_count, len(outlets), record_count)
+    return record_count
+
+
+def weather_fetch_pipeline(archive=False):
+    """
+    Main function to fetch weather data for all outlets and load it into PostgreSQL.
     Always fetches last 24 hours for all outlets.
     New outlets added to CSV are automatically included.
+    
+    Args:
+        archive: Also write the records to a Parquet file in data/weather/ for audit
     """
     project_root = Path(__file__).parent.parent
     outlets_csv = project_root / "csv_data" / "outlet.csv"
+    outlets_cache = project_root / "data" / ".outlets.cache.json"
+    weather_cache_dir = project_root / "data" / "cache"
     
-    # Load outlets dynamically from CSV
-    outlets = load_outlets(outlets_csv)
-    print(f"Found {len(outlets)} outlets with valid coordinates")
+    # Load outlets dynamically from CSV (cached while the file is unchanged)
+    outlets = load_outlets_cached(outlets_csv, outlets_cache)
+    logger.info("Found %d outlets with valid coordinates", len(outlets))
     
     # Always fetch last 24 hours for all outlets
     end_date = datetime.now()
     start_date = end_date - timedelta(hours=24)
     
-    print(f"Fetching hourly weather data for last 24 hours")
-    print(f"Time range: {start_date.strftime('%Y-%m-%d %H:%M')} to {end_date.strftime('%Y-%m-%d %H:%M')}")
-    print()
+    logger.info(
+        "Fetching hourly weather data for last 24 hours: %s to %s",
+        start_date.strftime('%Y-%m-%d %H:%M'), end_date.strftime('%Y-%m-%d %H:%M'),
+    )
     
-    # Fetch weather for all outlets
-    all_records = []
-    for outlet in outlets:
-        print(f"Fetching weather for {outlet['name']} (ID: {outlet['id']})...", end=" ")
+    # Archive to Parquet, partitioned by run date (hive-style directories)
+    writer = None
+    if archive:
+        output_dir = project_root / "data" / "weather"
+        timestamp = end_date.strftime("%Y%m%d_%H%M%S")
+        archive_name = f"date={end_date.strftime('%Y-%m-%d')}/weather_{timestamp}.parquet"
+        writer = WeatherWriter(output_dir / archive_name)
+    
+    # Fetch weather for all outlets concurrently, streaming results into one transaction
+    conn = connect()
+    try:
+        try:
+            record_count = asyncio.run(
+                fetch_and_save(outlets, start_date, end_date, weather_cache_dir, conn, writer)
+            )
+        finally:
+            if writer is not None:
+                writer.close()
         
-        weather_json = fetch_weather_data(
-            outlet['latitude'],
-            outlet['longitude'],
-            start_date,
-            end_date
-        )
+        # The archive is already in raw.weather, so load_csv_data.py must not load it again
+        if writer is not None and writer.record_count:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    'INSERT INTO raw.weather_loaded_files (filename) VALUES (%s);',
+                    (archive_name,)
+                )
         
-        if weather_json:
-            records = parse_weather_data(weather_json, outlet, start_date, end_date)
-            all_records.extend(records)
-            print(f"✓ {len(records)} hourly records")
-        else:
-            print("✗ Failed")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
     
-    # Save to CSV
-    if all_records:
-        output_dir = project_root / "data" / "weather"
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = output_dir / f"weather_{timestamp}.csv"
-        
-        save_to_csv(all_records, output_path)
-        print(f"\nTotal: {len(all_records)} records from {len(outlets)} outlets")
+    if record_count:
+        logger.info("Loaded %d records into raw.weather", record_count)
+        if writer is not None and writer.record_count:
+            logger.info("Archived %d records to %s", writer.record_count, writer.output_path)
     else:
-        print("\nNo weather data was successfully fetched")
+        logger.warning("No weather data was successfully fetched")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch hourly weather data for all outlets")
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Also write the fetched records to a Parquet file in data/weather/",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log the result for every outlet",
+    )
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    weather_fetch_pipeline(archive=args.archive)
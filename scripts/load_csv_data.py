@@ -3,7 +3,14 @@ Script to load CSV files into PostgreSQL raw schema tables.
 """
 
 import csv
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import itertools
+import operator
 import psycopg2
+from psycopg2.extras import execute_values
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from pathlib import Path
 import sys
 
@@ -27,8 +34,24 @@ CSV_FILES = {
     'rank': 'csv_data/rank.csv',
 }
 
-# Weather CSV files (optional - loaded from data/weather/)
-WEATHER_CSV_DIR = 'data/weather'
+# Number of tables loaded in parallel, each on its own connection
+MAX_WORKERS = 8
+
+# Weather Parquet files (optional - loaded from data/weather/date=*/)
+WEATHER_DIR = 'data/weather'
+
+# Load with COPY; set to False to fall back to batched INSERTs
+# (e.g. behind a connection pooler that does not support COPY)
+USE_COPY = True
+BATCH_SIZE = 1000
+
+# SQL templates, specialized once per table load
+COPY_SQL = 'COPY raw.{table_name} ({column_names}) FROM STDIN WITH CSV'
+INSERT_SQL = 'INSERT INTO raw.{table_name} ({column_names}) VALUES %s'
+
+def connect():
+    """Open a new connection using DB_CONFIG."""
+    return psycopg2.connect(**{k: v for k, v in DB_CONFIG.items() if v is not None})
 
 def get_table_schema(table_name):
     """Return CREATE TABLE SQL for each table."""
@@ -106,61 +129,220 @@ def get_table_schema(table_name):
                 latitude NUMERIC,
                 longitude NUMERIC,
                 datetime VARCHAR,
-                wind_speed_10m NUMERIC,
-                temperature_2m NUMERIC,
-                relative_humidity_2m NUMERIC
+                wind_speed_10m REAL,
+                temperature_2m REAL,
+                relative_humidity_2m SMALLINT
+            );
+        """,
+        'weather_loaded_files': """
+            CREATE TABLE IF NOT EXISTS raw.weather_loaded_files (
+                filename TEXT PRIMARY KEY,
+                loaded_at TIMESTAMP DEFAULT now()
             );
         """,
     }
     return schemas.get(table_name)
 
-def load_csv_to_table(conn, table_name, csv_path):
-    """Load CSV file into PostgreSQL table."""
-    print(f"Loading {table_name}...", end=" ")
+def quote_column(col):
+    """Quote column names that are reserved words in PostgreSQL."""
+    return f'"{col}"' if col in ['group', 'date'] else col
+
+def copy_csv_to_table(cursor, table_name, f, rename=None):
+    """
+    Stream an open CSV file into a table using COPY.
     
-    # Create table
-    cursor = conn.cursor()
-    cursor.execute(get_table_schema(table_name))
-    conn.commit()
+    The header line is consumed here and used as the column list, optionally
+    renaming CSV columns to table columns via the rename mapping.
     
-    # Truncate table if it exists
-    cursor.execute(f'TRUNCATE TABLE raw.{table_name};')
-    conn.commit()
+    Returns:
+        Number of rows copied
+    """
+    header = next(csv.reader([f.readline()]), None)
+    if not header:
+        return 0
+    
+    rename = rename or {}
+    column_names = ', '.join(quote_column(rename.get(col, col)) for col in header)
     
-    # Read CSV and insert data
+    cursor.copy_expert(COPY_SQL.format(table_name=table_name, column_names=column_names), f)
+    return cursor.rowcount
+
+def row_projector(columns):
+    """
+    Return a function that projects a row dict to a tuple in column order.
+    
+    itemgetter does the projection in C, but returns a bare value rather
+    than a tuple for a single column, so that case is wrapped.
+    """
+    getter = operator.itemgetter(*columns)
+    if len(columns) > 1:
+        return getter
+    
+    def project(row):
+        return (getter(row),)
+    return project
+
+def insert_csv_rows(cursor, table_name, f, rename=None):
+    """
+    Stream an open CSV file into a table using batched multi-row INSERTs.
+    
+    Rows are read lazily so at most BATCH_SIZE rows are held in memory, and
+    each batch is sent as a single INSERT ... VALUES (...), (...) statement.
+    
+    Returns:
+        Number of rows inserted
+    """
+    reader = csv.DictReader(f)
+    columns = reader.fieldnames
+    if not columns:
+        return 0
+    
+    rename = rename or {}
+    column_names = ', '.join(quote_column(rename.get(col, col)) for col in columns)
+    insert_sql = INSERT_SQL.format(table_name=table_name, column_names=column_names)
+    
+    project = row_projector(columns)
+    
+    row_count = 0
+    while True:
+        batch = list(itertools.islice(reader, BATCH_SIZE))
+        if not batch:
+            break
+        values = (project(row) for row in batch)
+        execute_values(cursor, insert_sql, values, page_size=BATCH_SIZE)
+        row_count += len(batch)
+    
+    return row_count
+
+def load_csv_file(cursor, table_name, f, rename=None):
+    """Load an open CSV file into a table with COPY or batched INSERTs."""
+    if USE_COPY:
+        return copy_csv_to_table(cursor, table_name, f, rename)
+    return insert_csv_rows(cursor, table_name, f, rename)
+
+def load_csv_to_table(conn, table_name, csv_path):
+    """Load CSV file into PostgreSQL table."""
     csv_file = Path(__file__).parent.parent / csv_path
     if not csv_file.exists():
-        print(f"✗ File not found: {csv_path}")
+        print(f"Loading {table_name}... ✗ File not found: {csv_path}")
         return False
     
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-        
-        if not rows:
-            print("✗ No data")
-            return False
+    # Create, truncate and load in a single transaction so WAL is flushed once
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SET LOCAL synchronous_commit = OFF;')
+        cursor.execute(get_table_schema(table_name))
+        cursor.execute(f'TRUNCATE TABLE raw.{table_name};')
         
-        # Get column names
-        columns = list(rows[0].keys())
+        # Stream CSV straight into the table
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            row_count = load_csv_file(cursor, table_name, f)
         
-        # Prepare insert statement
-        placeholders = ', '.join(['%s'] * len(columns))
-        column_names = ', '.join([f'"{col}"' if col in ['group', 'date'] else col for col in columns])
+        if not row_count:
+            conn.rollback()
+            print(f"Loading {table_name}... ✗ No data")
+            return False
         
-        insert_sql = f'INSERT INTO raw.{table_name} ({column_names}) VALUES ({placeholders})'
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    
+    print(f"Loading {table_name}... ✓ {row_count} rows loaded")
+    return True
+
+def load_csv_to_table_on_new_connection(table_name, csv_path):
+    """Load CSV file into PostgreSQL table using a dedicated connection."""
+    # psycopg2 connections must not be shared between concurrently running threads
+    conn = connect()
+    try:
+        return load_csv_to_table(conn, table_name, csv_path)
+    finally:
+        conn.close()
+
+def load_parquet_to_table(cursor, table_name, parquet_path, rename=None):
+    """
+    Load a Parquet file into a table.
+    
+    The file is converted to CSV in memory by PyArrow and then loaded through
+    the same COPY / INSERT path as the raw CSV files.
+    
+    Returns:
+        Number of rows loaded
+    """
+    table = pq.read_table(parquet_path)
+    if rename:
+        table = table.rename_columns([rename.get(col, col) for col in table.column_names])
+    
+    buffer = io.BytesIO()
+    pa_csv.write_csv(table, buffer)
+    buffer.seek(0)
+    
+    f = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    return load_csv_file(cursor, table_name, f)
+
+def load_weather_files(conn, weather_dir):
+    """
+    Append weather Parquet files that have not been loaded yet.
+    
+    Loaded files are recorded in raw.weather_loaded_files in the same
+    transaction as their rows, so each file is loaded exactly once.
+    
+    Returns:
+        Number of weather records loaded
+    """
+    if not weather_dir.exists():
+        return 0
+    
+    weather_files = sorted(weather_dir.glob('date=*/weather_*.parquet'))
+    if not weather_files:
+        return 0
+    
+    print()
+    print("Loading weather data...")
+    cursor = conn.cursor()
+    cursor.execute(get_table_schema('weather'))
+    cursor.execute(get_table_schema('weather_loaded_files'))
+    cursor.execute('SELECT filename FROM raw.weather_loaded_files;')
+    loaded_files = {row[0] for row in cursor.fetchall()}
+    conn.commit()
+    
+    weather_count = 0
+    skipped_count = 0
+    for weather_file in weather_files:
+        filename = weather_file.relative_to(weather_dir).as_posix()
+        if filename in loaded_files:
+            skipped_count += 1
+            continue
         
-        # Insert rows in batches
-        batch_size = 1000
-        for i in range(0, len(rows), batch_size):
-            batch = rows[i:i+batch_size]
-            values = [[row[col] for col in columns] for row in batch]
-            cursor.executemany(insert_sql, values)
+        print(f"Loading {weather_file.name}...", end=" ")
+        try:
+            cursor.execute('SET LOCAL synchronous_commit = OFF;')
+            row_count = load_parquet_to_table(cursor, 'weather', weather_file, rename={'time': 'datetime'})
+            cursor.execute(
+                'INSERT INTO raw.weather_loaded_files (filename) VALUES (%s);',
+                (filename,)
+            )
             conn.commit()
+            
+            if row_count:
+                weather_count += row_count
+                print(f"✓ {row_count} rows")
+            else:
+                print("✗ No data")
+        except Exception as e:
+            # A failed COPY aborts the transaction; reset it for the next file
+            conn.rollback()
+            print(f"✗ Error: {e}")
     
     cursor.close()
-    print(f"✓ {len(rows)} rows loaded")
-    return True
+    if skipped_count > 0:
+        print(f"Skipped {skipped_count} previously loaded weather files")
+    if weather_count > 0:
+        print(f"Total weather records loaded: {weather_count}")
+    return weather_count
 
 def main():
     """Main function."""
@@ -171,63 +353,27 @@ def main():
     print("=" * 60)
     
     try:
-        # Connect to database
-        conn = psycopg2.connect(**{k: v for k, v in DB_CONFIG.items() if v is not None})
-        print(f"Connected to database: {DB_CONFIG['database']}")
+        print(f"Connecting to database: {DB_CONFIG['database']}")
         print()
         
-        # Load each CSV file
+        # Load the independent CSV files in parallel, one connection per table
         success_count = 0
-        for table_name, csv_path in CSV_FILES.items():
-            if load_csv_to_table(conn, table_name, csv_path):
-                success_count += 1
-        
-        # Load weather CSV files (append, don't truncate)
-        weather_dir = project_root / WEATHER_CSV_DIR
-        if weather_dir.exists():
-            weather_files = sorted(weather_dir.glob('weather_*.csv'))
-            if weather_files:
-                print()
-                print("Loading weather data...")
-                cursor = conn.cursor()
-                cursor.execute(get_table_schema('weather'))
-                conn.commit()
-                
-                weather_count = 0
-                for weather_file in weather_files:
-                    print(f"Loading {weather_file.name}...", end=" ")
-                    try:
-                        with open(weather_file, 'r', encoding='utf-8') as f:
-                            reader = csv.DictReader(f)
-                            rows = list(reader)
-                            
-                            if rows:
-                                csv_columns = list(rows[0].keys())
-                                table_columns = ['datetime' if col == 'time' else col for col in csv_columns]
-                                
-                                placeholders = ', '.join(['%s'] * len(table_columns))
-                                column_names = ', '.join(table_columns)
-                                insert_sql = f'INSERT INTO raw.weather ({column_names}) VALUES ({placeholders})'
-                                
-                                batch_size = 1000
-                                for i in range(0, len(rows), batch_size):
-                                    batch = rows[i:i+batch_size]
-                                    values = [[row[col] for col in csv_columns] for row in batch]
-                                    cursor.executemany(insert_sql, values)
-                                    conn.commit()
-                                
-                                weather_count += len(rows)
-                                print(f"✓ {len(rows)} rows")
-                            else:
-                                print("✗ No data")
-                    except Exception as e:
-                        print(f"✗ Error: {e}")
-                
-                cursor.close()
-                if weather_count > 0:
-                    print(f"Total weather records loaded: {weather_count}")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(load_csv_to_table_on_new_connection, table_name, csv_path)
+                for table_name, csv_path in CSV_FILES.items()
+            ]
+            for future in as_completed(futures):
+                if future.result():
+                    success_count += 1
         
-        conn.close()
+        # Load new weather Parquet files (append, don't truncate)
+        conn = connect()
+        try:
+            conn.autocommit = False
+            weather_count = load_weather_files(conn, project_root / WEATHER_DIR)
+        finally:
+            conn.close()
         
         print()
         print("=" * 60)